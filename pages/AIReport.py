@@ -1,14 +1,21 @@
 import os
 import io
 import json
+import time
+import numpy as np
 import pandas as pd
 import streamlit as st
 import altair as alt
 import openai
+from utils.TicketStore import TicketStore
+from utils.sla_clock import DEFAULT_WORK_HOURS, compute_business_sla, parse_work_hours
 
 # -------- CONFIG --------
 DEFAULT_MODEL = "gpt-4.1-mini"
 SLA_FILE = "data.json"   # CRUD JSON file created earlier
+BUSINESS_TIMEZONE = "UTC"
+DEFAULT_HOLIDAYS = []    # "YYYY-MM-DD" dates that do not count against the SLA
+DATES_DAYFIRST = False   # read text dates like 05/01/2024 as 5 January
 
 SYSTEM_PROMPT = """You are an analyst assessing customer satisfaction in support tickets.
 Given the full conversation (messages from customer and admin), decide:
@@ -31,6 +38,53 @@ Task:
 3) rationale: one short paragraph
 Return JSON with keys: satisfaction, sentiment, rationale."""
 
+# -------- STRUCTURED OUTPUT CONFIG --------
+MAX_OUTPUT_TOKENS = 150
+RATIONALE_MAX_CHARS = 280
+STRUCTURED_MAX_ATTEMPTS = 2   # first call + one automatic retry
+TRUNCATED_RATIONALE_MAX_CHARS = 120   # retry bound when the first answer hit the token cap
+SATISFACTION_VALUES = ["yes", "no"]
+SENTIMENT_VALUES = ["positive", "neutral", "negative"]
+
+STRUCTURED_SYSTEM_PROMPT = f"""You assess customer satisfaction in support tickets.
+Read the conversation and fill every field of the response schema.
+Keep the rationale under {RATIONALE_MAX_CHARS} characters, citing message cues."""
+
+STRUCTURED_USER_PROMPT_TEMPLATE = """Ticket ID: {ticket_id}
+Customer: {customer_name}
+Product: {product_name}
+Status: {status}
+
+Conversation (chronological):
+{conversation}"""
+
+STRUCTURED_RETRY_PROMPT = f"""Your previous answer did not match the response schema.
+Answer again with satisfaction as yes/no, sentiment as positive/neutral/negative,
+and a rationale under {RATIONALE_MAX_CHARS} characters."""
+
+STRUCTURED_TRUNCATED_PROMPT = f"""Your previous answer was cut off by the output limit.
+Answer again with a rationale under {TRUNCATED_RATIONALE_MAX_CHARS} characters."""
+
+# maxLength is not accepted by strict structured outputs, so the rationale
+# bound lives in the description and is enforced again when parsing.
+RESPONSE_SCHEMA = {
+    "name": "ticket_satisfaction",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "satisfaction": {"type": "string", "enum": SATISFACTION_VALUES},
+            "sentiment": {"type": "string", "enum": SENTIMENT_VALUES},
+            "rationale": {
+                "type": "string",
+                "description": f"At most {RATIONALE_MAX_CHARS} characters.",
+            },
+        },
+        "required": ["satisfaction", "sentiment", "rationale"],
+        "additionalProperties": False,
+    },
+}
+
 
 # -------- SLA CONFIG --------
 def load_sla_config():
@@ -55,49 +109,26 @@ def get_sla_for_ticket(product_name, query_text, sla_config, default_days=2):
                 pass
     return default_days
 
+def get_work_hours(products, sla_config):
+    # Per-ticket working window (seconds since midnight) from the product's "Working Hours" entry
+    hours_by_product = {}
+    for entry in sla_config:
+        if entry.get("Working Hours") and entry.get("Product") not in hours_by_product:
+            try:
+                hours_by_product[entry.get("Product")] = parse_work_hours(entry["Working Hours"])
+            except ValueError as e:
+                st.warning(f"Ignoring working hours for {entry.get('Product')}, using {DEFAULT_WORK_HOURS}: {e}")
+    default = parse_work_hours(DEFAULT_WORK_HOURS)
+    # Missing products have code -1, which picks the trailing default
+    windows = [hours_by_product.get(p, default) for p in products.categories] + [default]
+    starts = np.array([w[0] for w in windows], dtype=np.int64)
+    ends = np.array([w[1] for w in windows], dtype=np.int64)
+    return starts[products.codes], ends[products.codes]
+
 
 # -------- UTILS --------
 def group_conversation(df):
-    tickets = {}
-    for _, row in df.iterrows():
-        tid = str(row.get("ticket_id", "")).strip()
-        if not tid:
-            continue
-        if tid not in tickets:
-            tickets[tid] = {
-                "ticket_id": tid,
-                "customer_id": row.get("customer_id"),
-                "customer_name": row.get("customer_name"),
-                "product_name": row.get("product_name"),
-                "status": row.get("status"),
-                "posted_date": row.get("posted_date"),
-                "closed_date": row.get("closed_date"),
-                "messages": [],
-            }
-        tickets[tid]["messages"].append({
-            "from": row.get("message_from"),
-            "content": row.get("msg_content"),
-            "msg_datetime": row.get("msg_datetime")
-        })
-
-    # Stitch raw text
-    for tid, info in tickets.items():
-        msgs = info["messages"]
-        stitched = []
-        for m in msgs:
-            stitched.append(f"{str(m['from']).upper()}: {m['content']} ({m['msg_datetime']})")
-        info["raw_text"] = "\n".join(stitched)
-    return tickets
-
-
-def compute_sla(posted_date, closed_date, sla_days):
-    dt_posted = pd.to_datetime(posted_date, utc=True, errors="coerce")
-    dt_closed = pd.to_datetime(closed_date, utc=True, errors="coerce")
-    if pd.isna(dt_posted) or pd.isna(dt_closed):
-        return {"sla_met": None, "resolution_hours": None}
-    delta = dt_closed - dt_posted
-    hours = delta.total_seconds() / 3600.0
-    return {"sla_met": hours <= sla_days * 24, "resolution_hours": round(hours, 2)}
+    return TicketStore.from_dataframe(df)
 
 
 def call_openai_for_satisfaction(client, ticket, model=DEFAULT_MODEL):
@@ -117,48 +148,160 @@ def call_openai_for_satisfaction(client, ticket, model=DEFAULT_MODEL):
         temperature=0.0,
     )
     content = response.choices[0].message.content
+    output_tokens = get_output_tokens(response)
     try:
         parsed = json.loads(content)
         return {
             "satisfaction": parsed.get("satisfaction"),
             "sentiment": parsed.get("sentiment"),
             "rationale": parsed.get("rationale"),
+            "output_tokens": output_tokens,
         }
     except Exception:
-        return {"satisfaction": None, "sentiment": None, "rationale": content}
-
-
-def build_report(tickets, results, sla_config):
-    rows = []
-    for tid, t in tickets.items():
-        # Use conversation text as "query_text" to match SLA by substring
-        query_text = t.get("raw_text", "")
-        sla_days = get_sla_for_ticket(t.get("product_name"), query_text, sla_config)
-        owner = "Unknown"
-        for entry in sla_config:
-            if entry.get("Product") == t.get("product_name"):
-                owner = entry.get("Owner", "Unknown")
-                break
-
-        sla = compute_sla(t.get("posted_date"), t.get("closed_date"), sla_days)
-        ai = results.get(tid, {})
-        rows.append({
-            "ticket_id": tid,
-            "customer_id": t.get("customer_id"),
-            "customer_name": t.get("customer_name"),
-            "product_name": t.get("product_name"),
-            "status": t.get("status"),
-            "posted_date": t.get("posted_date"),
-            "closed_date": t.get("closed_date"),
-            "resolution_hours": sla.get("resolution_hours"),
-            "sla_days": sla_days,
-            "sla_met": sla.get("sla_met"),
-            "owner": owner,
-            "ai_satisfaction": ai.get("satisfaction"),
-            "ai_sentiment": ai.get("sentiment"),
-            "ai_rationale": ai.get("rationale"),
-        })
-    df = pd.DataFrame(rows)
+        return {"satisfaction": None, "sentiment": None, "rationale": content, "output_tokens": output_tokens}
+
+
+def get_output_tokens(response):
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0
+    return getattr(usage, "completion_tokens", 0) or 0
+
+
+def parse_structured_response(content):
+    # Returns None when the answer does not match the schema so the caller can retry
+    try:
+        parsed = json.loads(content)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(parsed, dict):
+        return None
+    satisfaction = str(parsed.get("satisfaction", "")).lower()
+    sentiment = str(parsed.get("sentiment", "")).lower()
+    rationale = parsed.get("rationale")
+    if satisfaction not in SATISFACTION_VALUES or sentiment not in SENTIMENT_VALUES:
+        return None
+    if not isinstance(rationale, str):
+        return None
+    return {
+        "satisfaction": satisfaction,
+        "sentiment": sentiment,
+        "rationale": rationale.strip()[:RATIONALE_MAX_CHARS],
+    }
+
+
+def call_openai_structured(client, ticket, model=DEFAULT_MODEL, max_output_tokens=MAX_OUTPUT_TOKENS):
+    user_prompt = STRUCTURED_USER_PROMPT_TEMPLATE.format(
+        ticket_id=ticket.get("ticket_id"),
+        customer_name=ticket.get("customer_name"),
+        product_name=ticket.get("product_name"),
+        status=ticket.get("status"),
+        conversation=ticket.get("raw_text", "")
+    )
+    messages = [
+        {"role": "system", "content": STRUCTURED_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
+    output_tokens = 0
+    content = None
+    for attempt in range(1, STRUCTURED_MAX_ATTEMPTS + 1):
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.0,
+            max_completion_tokens=max_output_tokens,
+            response_format={"type": "json_schema", "json_schema": RESPONSE_SCHEMA},
+        )
+        output_tokens += get_output_tokens(response)
+        choice = response.choices[0]
+        # content is None when the model refuses; treat it like any other invalid answer
+        content = choice.message.content
+        parsed = parse_structured_response(content)
+        if parsed is not None:
+            parsed.update({"output_tokens": output_tokens, "attempts": attempt})
+            return parsed
+        if choice.finish_reason == "length":
+            # Cut off at the cap: ask for a shorter answer rather than raising the user's cap
+            messages = messages + [{"role": "user", "content": STRUCTURED_TRUNCATED_PROMPT}]
+        else:
+            messages = messages + [
+                {"role": "assistant", "content": content or ""},
+                {"role": "user", "content": STRUCTURED_RETRY_PROMPT},
+            ]
+    return {
+        "satisfaction": None,
+        "sentiment": None,
+        "rationale": None,
+        "raw_response": content,
+        "output_tokens": output_tokens,
+        "attempts": STRUCTURED_MAX_ATTEMPTS,
+    }
+
+
+def summarize_scoring_metrics(results):
+    latencies = pd.Series([r.get("latency_s") for r in results.values()], dtype="float64").dropna()
+    tokens = pd.Series([r.get("output_tokens") for r in results.values()], dtype="float64").fillna(0)
+    if latencies.empty:
+        return {}
+    return {
+        "tickets": len(results),
+        "latency_p50_s": round(latencies.quantile(0.50), 3),
+        "latency_p90_s": round(latencies.quantile(0.90), 3),
+        "latency_p99_s": round(latencies.quantile(0.99), 3),
+        "output_tokens_total": int(tokens.sum()),
+        "output_tokens_mean": round(tokens.mean(), 1),
+        "retries": int(sum(max(r.get("attempts", 1) - 1, 0) for r in results.values())),
+    }
+
+
+def build_report(tickets, results, sla_config, holidays=DEFAULT_HOLIDAYS, dayfirst=DATES_DAYFIRST):
+    owner_by_product = {}
+    for entry in sla_config:
+        owner_by_product.setdefault(entry.get("Product"), entry.get("Owner", "Unknown"))
+
+    products = tickets.column("product_name")
+    posted = tickets.column("posted_date")
+    closed = tickets.column("closed_date")
+    # Use conversation text as "query_text" to match SLA by substring
+    sla_days = [
+        get_sla_for_ticket(products[i], tickets.raw_text(i), sla_config)
+        for i in range(len(tickets))
+    ]
+    work_start, work_end = get_work_hours(products, sla_config)
+    sla = compute_business_sla(
+        posted, closed, sla_days, work_start, work_end,
+        holidays=holidays, tz=BUSINESS_TIMEZONE, dayfirst=dayfirst,
+    )
+    if sla["unparsed_dates"]:
+        st.warning(f"{sla['unparsed_dates']} posted/closed dates could not be parsed; those tickets have no SLA status.")
+    if sla["invalid_date_ranges"]:
+        st.warning(f"{sla['invalid_date_ranges']} tickets are closed before they were posted; check the date order setting. Those tickets have no SLA status.")
+    if sla["rejected_holidays"]:
+        st.warning(f"Ignoring holidays that are not valid YYYY-MM-DD dates: {', '.join(sla['rejected_holidays'])}")
+
+    ai = [results.get(tid, {}) for tid in tickets.ticket_ids]
+    df = pd.DataFrame({
+        "ticket_id": tickets.ticket_ids,
+        "customer_id": tickets.column("customer_id"),
+        "customer_name": tickets.column("customer_name"),
+        "product_name": products,
+        "status": tickets.column("status"),
+        "posted_date": posted,
+        "closed_date": closed,
+        "resolution_hours": sla["resolution_hours"],
+        "business_hours": sla["business_hours"],
+        "sla_days": sla_days,
+        "sla_met": sla["sla_met"],
+        "sla_status": sla["sla_status"],
+        "hours_to_breach": sla["hours_to_breach"],
+        "owner": [owner_by_product.get(p, "Unknown") for p in products],
+        "ai_satisfaction": [a.get("satisfaction") for a in ai],
+        "ai_sentiment": [a.get("sentiment") for a in ai],
+        "ai_rationale": [a.get("rationale") for a in ai],
+        "ai_raw_response": [a.get("raw_response") for a in ai],
+        "ai_output_tokens": [a.get("output_tokens") for a in ai],
+        "ai_latency_s": [a.get("latency_s") for a in ai],
+    })
 
     def verdict(row):
         sat = str(row["ai_satisfaction"]).lower()
@@ -182,6 +325,10 @@ st.title("Ticket Interaction Analysis")
 st.sidebar.markdown("## Configuration")
 api_key = st.sidebar.text_input("OpenAI API Key", type="password")
 model_name = st.sidebar.text_input("Model", value=DEFAULT_MODEL)
+structured_scoring = st.sidebar.checkbox("Structured output scoring", value=True)
+max_output_tokens = st.sidebar.number_input("Max output tokens", min_value=32, max_value=1024, value=MAX_OUTPUT_TOKENS, step=16)
+dates_dayfirst = st.sidebar.checkbox("Dates are day-first (DD/MM/YYYY)", value=DATES_DAYFIRST)
+holidays_text = st.sidebar.text_area("Holidays (one YYYY-MM-DD per line)", value="\n".join(DEFAULT_HOLIDAYS))
 
 uploaded = st.file_uploader("Upload ticket Excel", type=["xlsx"])
 run_btn = st.button("Run Analysis")
@@ -219,22 +366,38 @@ if run_btn:
     ai_results = {}
     progress = st.progress(0)
     for i, (tid, t) in enumerate(tickets.items(), start=1):
-        ai_results[tid] = call_openai_for_satisfaction(client, t, model=model_name)
+        started = time.perf_counter()
+        if structured_scoring:
+            ai_results[tid] = call_openai_structured(client, t, model=model_name, max_output_tokens=int(max_output_tokens))
+        else:
+            ai_results[tid] = call_openai_for_satisfaction(client, t, model=model_name)
+        ai_results[tid]["latency_s"] = round(time.perf_counter() - started, 3)
         progress.progress(i / len(tickets))
 
     # Report
-    report_df = build_report(tickets, ai_results, sla_config)
+    report_df = build_report(tickets, ai_results, sla_config, holidays=holidays_text.split(), dayfirst=dates_dayfirst)
 
     st.subheader("Final Report")
     st.dataframe(report_df, use_container_width=True)
 
+    # --- Scoring performance ---
+    metrics = summarize_scoring_metrics(ai_results)
+    if metrics:
+        st.subheader("Scoring Performance")
+        m1, m2, m3, m4, m5 = st.columns(5)
+        m1.metric("Latency p50 (s)", metrics["latency_p50_s"])
+        m2.metric("Latency p90 (s)", metrics["latency_p90_s"])
+        m3.metric("Latency p99 (s)", metrics["latency_p99_s"])
+        m4.metric("Output tokens", metrics["output_tokens_total"], help=f"{metrics['output_tokens_mean']} per ticket")
+        m5.metric("Retries", metrics["retries"])
+
     # --- Charts ---
     st.subheader("Charts")
 
     chart1 = alt.Chart(report_df).mark_bar().encode(
         x=alt.X("product_name:N", title="Product"),
         y=alt.Y("count():Q", title="Cases"),
-        color="sla_met:N"
+        color="sla_status:N"
     ).properties(title="SLA Compliance by Product")
     st.altair_chart(chart1, use_container_width=True)
 
@@ -2,6 +2,7 @@ import streamlit as st
 import json
 import os
 import pandas as pd
+from utils.sla_clock import parse_work_hours
 
 # File to store data
 DATA_FILE = "data.json"
@@ -18,6 +19,16 @@ def save_data(data):
     with open(DATA_FILE, "w") as f:
         json.dump(data, f, indent=4)
 
+# Working hours are optional, but a value that is set must parse
+def working_hours_error(hours):
+    if not hours.strip():
+        return None
+    try:
+        parse_work_hours(hours)
+    except ValueError as e:
+        return str(e)
+    return None
+
 # Initialize session state
 if "data" not in st.session_state:
     st.session_state.data = load_data()
@@ -35,12 +46,17 @@ with tab1:
         query = st.text_input("Query")
         owner = st.text_input("Owner")
         sla = st.text_input("SLA")
+        hours = st.text_input("Working Hours", placeholder="09:00-18:00")
         submitted = st.form_submit_button("Add Record")
         if submitted:
-            new_record = {"Product": Product, "Query": query, "Owner": owner, "SLA": sla}
-            st.session_state.data.append(new_record)
-            save_data(st.session_state.data)
-            st.success("Record added successfully!")
+            error = working_hours_error(hours)
+            if error:
+                st.error(error)
+            else:
+                new_record = {"Product": Product, "Query": query, "Owner": owner, "SLA": sla, "Working Hours": hours.strip()}
+                st.session_state.data.append(new_record)
+                save_data(st.session_state.data)
+                st.success("Record added successfully!")
 
 # --- READ ---
 with tab2:
@@ -66,12 +82,17 @@ with tab3:
             query = st.text_input("Query", value=record["Query"])
             owner = st.text_input("Owner", value=record["Owner"])
             sla = st.text_input("SLA", value=record["SLA"])
+            hours = st.text_input("Working Hours", value=record.get("Working Hours", ""), placeholder="09:00-18:00")
             update = st.form_submit_button("Update Record")
 
             if update:
-                st.session_state.data[record_index] = {"Product": Product, "Query": query, "Owner": owner, "SLA": sla}
-                save_data(st.session_state.data)
-                st.success("Record updated successfully!")
+                error = working_hours_error(hours)
+                if error:
+                    st.error(error)
+                else:
+                    st.session_state.data[record_index] = {"Product": Product, "Query": query, "Owner": owner, "SLA": sla, "Working Hours": hours.strip()}
+                    save_data(st.session_state.data)
+                    st.success("Record updated successfully!")
     else:
         st.info("No records to update.")
 
@@ -0,0 +1,238 @@
+import sys
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+TICKET_FIELDS = ["customer_id", "customer_name", "product_name", "status", "posted_date", "closed_date"]
+CATEGORICAL_FIELDS = ["customer_id", "customer_name", "product_name", "status"]
+
+
+class TicketView:
+    """Read-only, dict-like view of one ticket in a TicketStore"""
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    def get(self, key, default=None):
+        if key == "ticket_id":
+            return self._store.ticket_ids[self._index]
+        if key == "raw_text":
+            return self._store.raw_text(self._index)
+        if key == "messages":
+            return self._store.messages(self._index)
+        if key in TICKET_FIELDS:
+            return self._store.column(key)[self._index]
+        return default
+
+    def __getitem__(self, key):
+        if key not in TICKET_FIELDS and key not in ("ticket_id", "raw_text", "messages"):
+            raise KeyError(key)
+        return self.get(key)
+
+
+class TicketStore:
+    """
+    Columnar store for grouped ticket conversations.
+
+    Ticket-level fields are one column per field (categoricals for
+    customer, product and status). Message text lives in a single shared
+    UTF-8 bytes buffer; each ticket owns the slice
+    msg_offsets[i]:msg_offsets[i + 1] of the message columns, and each
+    message the byte slice msg_bounds[j]:msg_bounds[j + 1] of the buffer.
+    A Python str buffer would widen to 4 bytes per character as soon as
+    one message held an emoji. raw_text is rendered on demand instead of
+    being stored.
+    """
+
+    def __init__(self, ticket_ids, columns, msg_offsets, msg_from, msg_buffer, msg_bounds, msg_datetime):
+        self.ticket_ids = ticket_ids
+        self._columns = columns
+        self.msg_offsets = msg_offsets
+        self._msg_from = msg_from
+        self.msg_buffer = msg_buffer
+        self.msg_bounds = msg_bounds
+        self._msg_datetime = msg_datetime
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Group message rows by ticket_id, keeping first-seen ticket and row order"""
+        # str() on object values rather than astype(str): pandas 3 keeps NaN as NaN
+        # under astype, while the stitched text has always shown missing values as "nan"
+        tid = df["ticket_id"].astype(object).map(str).str.strip()
+        keep = (tid != "").to_numpy()
+        df = df.loc[keep]
+        tid = tid[keep]
+
+        codes, uniques = pd.factorize(tid, sort=False)
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes, minlength=len(uniques))
+        msg_offsets = np.zeros(len(uniques) + 1, dtype=np.int64)
+        np.cumsum(counts, out=msg_offsets[1:])
+        # Ticket-level fields come from the first row of each ticket
+        first_rows = order[msg_offsets[:-1]]
+
+        columns = {}
+        for field in TICKET_FIELDS:
+            values = df[field].iloc[first_rows]
+            if field in CATEGORICAL_FIELDS:
+                columns[field] = pd.Categorical(values)
+            else:
+                columns[field] = values.array
+
+        content = [str(c).encode("utf-8") for c in df["msg_content"].iloc[order].tolist()]
+        msg_bounds = np.zeros(len(content) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, content), dtype=np.int64, count=len(content)), out=msg_bounds[1:])
+
+        return cls(
+            ticket_ids=pd.Index(uniques),
+            columns=columns,
+            msg_offsets=msg_offsets,
+            msg_from=pd.Categorical(df["message_from"].iloc[order]),
+            msg_buffer=b"".join(content),
+            msg_bounds=msg_bounds,
+            msg_datetime=df["msg_datetime"].iloc[order].array,
+        )
+
+    def __len__(self):
+        return len(self.ticket_ids)
+
+    def __contains__(self, ticket_id):
+        return ticket_id in self.ticket_ids
+
+    def __iter__(self):
+        return iter(self.ticket_ids)
+
+    def __getitem__(self, ticket_id):
+        return TicketView(self, self.ticket_ids.get_loc(ticket_id))
+
+    def keys(self):
+        return iter(self.ticket_ids)
+
+    def items(self):
+        for i, tid in enumerate(self.ticket_ids):
+            yield tid, TicketView(self, i)
+
+    def column(self, field):
+        return self._columns[field]
+
+    def message_content(self, j):
+        return self.msg_buffer[self.msg_bounds[j]:self.msg_bounds[j + 1]].decode("utf-8")
+
+    def messages(self, i):
+        return [
+            {
+                "from": self._msg_from[j],
+                "content": self.message_content(j),
+                "msg_datetime": self._msg_datetime[j],
+            }
+            for j in range(self.msg_offsets[i], self.msg_offsets[i + 1])
+        ]
+
+    def raw_text(self, i):
+        return "\n".join(
+            f"{str(self._msg_from[j]).upper()}: {self.message_content(j)} ({self._msg_datetime[j]})"
+            for j in range(self.msg_offsets[i], self.msg_offsets[i + 1])
+        )
+
+
+# -------- MEMORY BENCHMARK --------
+def _group_as_dicts(df):
+    # The dict-of-dicts layout TicketStore replaces, kept as the benchmark baseline
+    tickets = {}
+    for row in df.to_dict("records"):
+        tid = str(row.get("ticket_id", "")).strip()
+        if not tid:
+            continue
+        if tid not in tickets:
+            tickets[tid] = {field: row.get(field) for field in TICKET_FIELDS}
+            tickets[tid]["ticket_id"] = tid
+            tickets[tid]["messages"] = []
+        tickets[tid]["messages"].append({
+            "from": row.get("message_from"),
+            "content": row.get("msg_content"),
+            "msg_datetime": row.get("msg_datetime")
+        })
+    for info in tickets.values():
+        info["raw_text"] = "\n".join(
+            f"{str(m['from']).upper()}: {m['content']} ({m['msg_datetime']})" for m in info["messages"]
+        )
+    return tickets
+
+
+def _synthetic_export(n_tickets, msgs_per_ticket, seed=0):
+    rng = np.random.default_rng(seed)
+    n_rows = n_tickets * msgs_per_ticket
+    ticket_no = rng.integers(0, n_tickets, n_rows)
+    customer_no = ticket_no % max(n_tickets // 4, 1)
+    posted = pd.Timestamp("2024-01-01") + pd.to_timedelta(ticket_no * 600, unit="s")
+    # Non-ASCII words too: real exports carry currency symbols, emoji and Hindi text
+    words = np.array(["please", "update", "my", "folio", "redemption", "status", "thanks", "pending", "invested", "bond",
+                      "₹50,000", "🙏", "धन्यवाद", "café"])
+    content = [" ".join(rng.choice(words, 12)) for _ in range(n_rows)]
+    df = pd.DataFrame({
+        "ticket_id": [f"T{t:07d}" for t in ticket_no],
+        "customer_id": [f"C{c:06d}" for c in customer_no],
+        "customer_name": [f"Customer {c}" for c in customer_no],
+        "product_name": rng.choice(["Equity", "Bond", "PMS"], n_rows),
+        "message_from": rng.choice(["customer", "admin"], n_rows),
+        "msg_content": content,
+        "msg_datetime": posted + pd.to_timedelta(rng.integers(0, 86400, n_rows), unit="s"),
+        "status": rng.choice(["Open", "Closed"], n_rows),
+        "posted_date": posted,
+        "closed_date": posted + pd.Timedelta(days=1),
+    })
+    # Real exports have gaps: a row without a ticket id and attachment-only messages
+    df["ticket_id"] = df["ticket_id"].astype(object)
+    df["msg_content"] = df["msg_content"].astype(object)
+    df.loc[0, "ticket_id"] = np.nan
+    df.loc[1::50, "msg_content"] = np.nan
+    return df
+
+
+def _traced_bytes(build, df):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(df)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return retained
+
+
+def check_against_dicts(df):
+    """Count tickets whose fields or raw_text differ from the dict-of-dicts layout"""
+    store = TicketStore.from_dataframe(df)
+    expected = _group_as_dicts(df)
+    mismatches = len(set(expected) ^ set(store))
+    for tid, ticket in store.items():
+        old = expected.get(tid)
+        if old is None:
+            continue
+        for field in ["raw_text"] + TICKET_FIELDS:
+            if str(ticket.get(field)) != str(old[field]):
+                mismatches += 1
+                break
+    return mismatches
+
+
+def memory_benchmark(n_tickets=20000, msgs_per_ticket=8):
+    """Compare memory retained by the dict-of-dicts grouping and by TicketStore"""
+    df = _synthetic_export(n_tickets, msgs_per_ticket)
+    source_bytes = int(df.memory_usage(deep=True).sum())
+    dict_bytes = _traced_bytes(_group_as_dicts, df)
+    store_bytes = _traced_bytes(TicketStore.from_dataframe, df)
+    return {
+        "rows": len(df),
+        "source_mb": round(source_bytes / 2**20, 2),
+        "dict_of_dicts_mb": round(dict_bytes / 2**20, 2),
+        "ticket_store_mb": round(store_bytes / 2**20, 2),
+        "ratio": round(dict_bytes / max(store_bytes, 1), 1),
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print("mismatches:", check_against_dicts(_synthetic_export(min(n, 2000), 8)))
+    print(memory_benchmark(n_tickets=n))